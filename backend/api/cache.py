@@ -0,0 +1,12 @@
+import hashlib
+
+
+def query_cache_key(prefix, request, ignored=()):
+    """Cache key for a request's path, user and normalized query params."""
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+        if key not in ignored
+    )
+    raw = f'{request.path}|{request.user.pk}|{params}'
+    return f'{prefix}:{hashlib.sha1(raw.encode()).hexdigest()}'
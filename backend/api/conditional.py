@@ -0,0 +1,46 @@
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from recipes.versions import get_user_stamp, get_versions
+
+
+def get_stamps(request, models):
+    cache_attr = '_model_versions'
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, get_versions(models))
+    return getattr(request, cache_attr)
+
+
+def conditional_on(*models, per_user=False, name=''):
+    """Answer GET with 304 while the version stamps of ``models`` hold."""
+
+    def etag_func(request, *args, **kwargs):
+        stamps = get_stamps(request, models)
+        parts = [
+            f'{label}:{version}'
+            for label, (version, _) in sorted(stamps.items())
+        ]
+        parts.append(request.get_full_path())
+        parts.append(request.META.get('HTTP_ACCEPT', ''))
+        if per_user and request.user.is_authenticated:
+            parts.append(str(request.user.pk))
+            parts.extend(map(str, get_user_stamp(request.user)))
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if per_user:
+            return None
+        modified = [
+            modified for _, modified in get_stamps(request, models).values()
+            if modified is not None
+        ]
+        return max(modified, default=None)
+
+    decorators = [
+        vary_on_headers('Accept', 'Authorization'),
+        condition(etag_func=etag_func, last_modified_func=last_modified_func),
+    ]
+    return method_decorator(decorators, name=name)
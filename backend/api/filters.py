@@ -1,31 +1,104 @@
+from django import forms
+from django.db.models import Exists, OuterRef, Q
+
 from django_filters import rest_framework as django_filter
-from recipes.models import Recipe
+from django_filters.widgets import QueryArrayWidget
+from recipes.models import Recipe, TagRecipe
+from recipes.search import get_tag_ids_by_slug, search_recipes
 from rest_framework import filters
 from users.models import User
 
+TAGS_MATCH_ANY = 'any'
+TAGS_MATCH_ALL = 'all'
+COOKING_TIME_BUCKETS = (15, 30, 60, 120)
+LEADERBOARD_ORDERINGS = {
+    'popular': 'popularity',
+    'trending': 'trending',
+}
+
+
+class SlugListField(forms.Field):
+    widget = QueryArrayWidget
+
+    def to_python(self, value):
+        return [slug for slug in value or [] if slug]
+
+
+class SlugListFilter(django_filter.Filter):
+    field_class = SlugListField
+
 
 class RecipeFilters(django_filter.FilterSet):
     author = django_filter.ModelChoiceFilter(queryset=User.objects.all())
-    tags = django_filter.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = SlugListFilter(method='get_tags')
+    tags_match = django_filter.ChoiceFilter(
+        choices=((TAGS_MATCH_ANY, 'Any'), (TAGS_MATCH_ALL, 'All')),
+        method='get_tags_match'
+    )
     is_favorited = django_filter.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = django_filter.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = django_filter.CharFilter(method='get_search')
+    ordering = django_filter.ChoiceFilter(
+        choices=(('popular', 'Popular'), ('trending', 'Trending')),
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
 
+    @staticmethod
+    def tags_condition(slugs, match_all=False):
+        """Q for recipes with any (or all) of the slugs, None if none match."""
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        slugs = set(slugs)
+        tag_ids = {
+            tag_ids_by_slug[slug] for slug in slugs if slug in tag_ids_by_slug
+        }
+        if not tag_ids or match_all and len(tag_ids) < len(slugs):
+            return None
+        if not match_all:
+            return Q(Exists(TagRecipe.objects.filter(
+                recipe=OuterRef('pk'), tag_id__in=tag_ids
+            )))
+        condition = Q()
+        for tag_id in tag_ids:
+            condition &= Q(Exists(TagRecipe.objects.filter(
+                recipe=OuterRef('pk'), tag_id=tag_id
+            )))
+        return condition
+
+    def get_tags(self, queryset, name, value):
+        condition = self.tags_condition(
+            value, self.form.cleaned_data.get('tags_match') == TAGS_MATCH_ALL
+        )
+        if condition is None:
+            return queryset.none()
+        return queryset.filter(condition)
+
+    def get_tags_match(self, queryset, name, value):
+        return queryset
+
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(carts__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset.all()
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.filter(leaderboard__isnull=False).order_by(
+            f'-leaderboard__{LEADERBOARD_ORDERINGS[value]}', '-pk'
+        )
+
 
 class IngredientSearchFilter(filters.SearchFilter):
     search_param = 'name'
@@ -1,6 +1,255 @@
+import heapq
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import query_cache_key
+
+
+class LookaheadPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """Reports a cached or estimated total; pages look one row ahead."""
+
+    def __init__(self, *args, cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return LookaheadPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    @cached_property
+    def counted(self):
+        if self.cache_key:
+            cached = cache.get(self.cache_key)
+            if cached is not None:
+                return cached[0], False
+        estimate = self.estimate_count()
+        if (
+            estimate is not None
+            and estimate > settings.PAGINATION_ESTIMATE_THRESHOLD
+        ):
+            counted = (estimate, False)
+        else:
+            counted = (super().count, True)
+        if self.cache_key:
+            cache.set(
+                self.cache_key, counted,
+                settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+        return counted
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_exact(self):
+        return self.counted[1]
+
+    def estimate_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
 
 
 class PageNumberLimitPagination(pagination.PageNumberPagination):
     page_size_query_param = 'limit'
     max_page_size = 50
+    cache_key = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(CachedCountPaginator, cache_key=self.cache_key)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cache_key = query_cache_key(
+            'pagination_count', request,
+            ignored=(self.page_query_param, self.page_size_query_param)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
+
+class RecipeKeysetPagination(pagination.BasePagination):
+    """Keyset pagination over (pub_date, id), newest first."""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    max_page_size = 50
+    invalid_cursor_message = 'Invalid cursor'
+    ordering_query_params = ('ordering', 'search')
+
+    page_size = api_settings.PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            return pagination._positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, pk, reverse = b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk, reverse == '1'
+
+    def get_position(self, item):
+        return item.pub_date, item.pk
+
+    def encode_cursor(self, item, reverse):
+        pub_date, pk = self.get_position(item)
+        position = f'{pub_date.isoformat()}|{pk}|{int(reverse)}'
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            b64encode(position.encode('ascii')).decode('ascii')
+        )
+
+    def get_range(self, queryset, cursor, pk_field='pk'):
+        """Order ``queryset`` by position and skip past the cursor."""
+        reverse = cursor is not None and cursor[2]
+        if cursor is not None:
+            pub_date, pk, _ = cursor
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'{pk_field}__{lookup}': pk})
+            )
+        if reverse:
+            return queryset.order_by('pub_date', pk_field)
+        return queryset.order_by('-pub_date', f'-{pk_field}')
+
+    def check_ordering(self, request):
+        errors = {
+            param: f'Cannot be combined with {self.cursor_query_param}.'
+            for param in self.ordering_query_params
+            if request.query_params.get(param)
+        }
+        if errors:
+            raise ValidationError(errors)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.check_ordering(request)
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        results = list(self.get_range(queryset, cursor)[:page_size + 1])
+        return self.get_page(results, page_size, cursor)
+
+    def get_page(self, results, page_size, cursor):
+        reverse = cursor is not None and cursor[2]
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        self.next = self.previous = None
+        if results and (reverse or has_more):
+            self.next = self.encode_cursor(results[-1], False)
+        if results and (has_more if reverse else cursor is not None):
+            self.previous = self.encode_cursor(results[0], True)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next,
+            'previous': self.previous,
+            'results': data,
+        })
+
+
+class FeedKeysetPagination(RecipeKeysetPagination):
+    """Keyset pagination merging ``(pub_date, recipe_id)`` feed sources."""
+
+    def get_position(self, item):
+        return item
+
+    def paginate_queryset(self, sources, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        pages = [
+            self.get_range(
+                source.values_list('pub_date', 'recipe_id'), cursor,
+                pk_field='recipe_id'
+            )[:page_size + 1]
+            for source in sources
+        ]
+        results = []
+        for item in heapq.merge(*pages, reverse=not reverse):
+            if not results or results[-1] != item:
+                results.append(item)
+            if len(results) > page_size:
+                break
+        return self.get_page(results, page_size, cursor)
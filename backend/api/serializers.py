@@ -1,3 +1,5 @@
+from django.db import transaction
+
 from djoser.serializers import UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField
 from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
@@ -16,6 +18,8 @@ class CommonSubscribed(metaclass=serializers.SerializerMetaclass):
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'subscribed'):
+            return obj.subscribed
         request = self.context.get('request')
         return (
             Subscribe.objects.filter(
@@ -31,6 +35,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return (
             Favorite.objects.filter(
@@ -42,6 +48,8 @@ class CommonRecipe(metaclass=serializers.SerializerMetaclass):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return (
             Cart.objects.filter(
@@ -57,7 +65,7 @@ class CommonCount(metaclass=serializers.SerializerMetaclass):
     recipes_count = serializers.SerializerMethodField()
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author__id=obj.id).count()
+        return obj.recipes_count
 
 
 class RegistrationSerializer(UserCreateSerializer, CommonSubscribed):
@@ -111,6 +119,9 @@ class IngredientAmountRecipeSerializer(serializers.ModelSerializer):
         model = IngredientRecipe
         fields = ('id', 'amount')
 
+    def to_representation(self, instance):
+        return {'id': instance.ingredient_id, 'amount': instance.amount}
+
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -164,6 +175,17 @@ class RecipeSerializer(
         )
 
 
+class CookableRecipeSerializer(RecipeSerializer):
+    ingredients_matched = serializers.IntegerField(read_only=True)
+    ingredients_total = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'ingredients_matched',
+            'ingredients_total'
+        )
+
+
 class RecipeSerializerPost(
     serializers.ModelSerializer,
     CommonRecipe
@@ -194,51 +216,94 @@ class RecipeSerializerPost(
         )
 
     def validate_ingredients(self, value):
-        ingredients_list = []
-        ingredients = value
-        for ingredient in ingredients:
-            if ingredient['amount'] < 1:
-                raise serializers.ValidationError(
-                    AMOUNT_IS_NOT_POSITIVE_ERROR
-                )
-            id_to_check = ingredient['ingredient']['id']
-            ingredient_to_check = Ingredient.objects.filter(id=id_to_check)
-            if not ingredient_to_check.exists():
-                raise serializers.ValidationError(
-                    INGREDIENT_DOES_NOT_EXIST_ERROR
-                )
-            if ingredient_to_check in ingredients_list:
-                raise serializers.ValidationError(
-                    INGREDIENT_IS_NOT_UNIQUE_ERROR
-                )
-            ingredients_list.append(ingredient_to_check)
+        if any(ingredient['amount'] < 1 for ingredient in value):
+            raise serializers.ValidationError(AMOUNT_IS_NOT_POSITIVE_ERROR)
+        ingredient_ids = [
+            ingredient['ingredient']['id'] for ingredient in value
+        ]
+        unique_ids = set(ingredient_ids)
+        if len(unique_ids) != len(ingredient_ids):
+            raise serializers.ValidationError(INGREDIENT_IS_NOT_UNIQUE_ERROR)
+        existing_ids = set(
+            Ingredient.objects.filter(
+                id__in=unique_ids
+            ).values_list('id', flat=True)
+        )
+        if existing_ids != unique_ids:
+            raise serializers.ValidationError(INGREDIENT_DOES_NOT_EXIST_ERROR)
         return value
 
+    @staticmethod
+    def add_tags(tag_ids, recipe):
+        TagRecipe.objects.bulk_create(
+            TagRecipe(tag_id=tag_id, recipe=recipe) for tag_id in tag_ids
+        )
+
+    @staticmethod
+    def add_ingredients(amounts, recipe):
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient_id=ingredient_id, recipe=recipe, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+        )
+
+    @staticmethod
+    def get_amounts(ingredients):
+        return {
+            ingredient['ingredient']['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+
     def add_tags_and_ingredients(self, tags_data, ingredients, recipe):
-        for tag_data in tags_data:
-            recipe.tags.add(tag_data)
-            recipe.save()
-        for ingredient in ingredients:
-            if not IngredientRecipe.objects.filter(
-                ingredient_id=ingredient['ingredient']['id'],
-                recipe=recipe
-            ).exists():
-                ingredientrecipe = IngredientRecipe.objects.create(
-                    ingredient_id=ingredient['ingredient']['id'],
-                    recipe=recipe
-                )
-                ingredientrecipe.amount = ingredient['amount']
-                ingredientrecipe.save()
-            else:
-                IngredientRecipe.objects.filter(
-                    recipe=recipe
-                ).delete()
-                recipe.delete()
-                raise serializers.ValidationError(
-                    INGREDIENT_IS_NOT_UNIQUE_ERROR
-                )
+        self.add_tags(dict.fromkeys(tag.id for tag in tags_data), recipe)
+        self.add_ingredients(self.get_amounts(ingredients), recipe)
         return recipe
 
+    def update_tags(self, tags_data, recipe):
+        current = set(
+            TagRecipe.objects.filter(
+                recipe=recipe
+            ).values_list('tag_id', flat=True)
+        )
+        submitted = {tag.id for tag in tags_data}
+        if current - submitted:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=current - submitted
+            ).delete()
+        if submitted - current:
+            self.add_tags(submitted - current, recipe)
+
+    def update_ingredients(self, ingredients, recipe):
+        current = {
+            ingredientrecipe.ingredient_id: ingredientrecipe
+            for ingredientrecipe in IngredientRecipe.objects.filter(
+                recipe=recipe
+            ).only('id', 'ingredient_id', 'amount')
+        }
+        submitted = self.get_amounts(ingredients)
+        removed = current.keys() - submitted.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                id__in=[current[key].id for key in removed]
+            ).delete()
+        changed = []
+        for ingredient_id, amount in submitted.items():
+            ingredientrecipe = current.get(ingredient_id)
+            if ingredientrecipe and ingredientrecipe.amount != amount:
+                ingredientrecipe.amount = amount
+                changed.append(ingredientrecipe)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        added = {
+            ingredient_id: amount
+            for ingredient_id, amount in submitted.items()
+            if ingredient_id not in current
+        }
+        if added:
+            self.add_ingredients(added, recipe)
+
+    @transaction.atomic
     def create(self, validated_data):
         author = validated_data.get('author')
         tags_data = validated_data.pop('tags')
@@ -256,17 +321,15 @@ class RecipeSerializerPost(
         )
         return self.add_tags_and_ingredients(tags_data, ingredients, recipe)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        tags_data = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredientrecipes')
-        TagRecipe.objects.filter(recipe=instance).delete()
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        instance = self.add_tags_and_ingredients(
-            tags_data, ingredients, instance
-        )
-        super().update(instance, validated_data)
-        instance.save()
-        return instance
+        tags_data = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredientrecipes', None)
+        if tags_data is not None:
+            self.update_tags(tags_data, instance)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
+        return super().update(instance, validated_data)
 
 
 class RecipeMinifieldSerializer(serializers.ModelSerializer):
@@ -296,6 +359,11 @@ class SubscriptionSerializer(
         )
 
     def get_recipes(self, obj):
+        recipes = self.context.get('recipes')
+        if recipes is not None:
+            return RecipeMinifieldSerializer(
+                recipes.get(obj.id, []), many=True
+            ).data
         request = self.context.get('request')
         if request.GET.get('recipes_limit'):
             recipes_limit = int(request.GET.get('recipes_limit'))
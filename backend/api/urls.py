@@ -27,6 +27,11 @@ urlpatterns = [
         DownloadCart.as_view({'get': 'download'}),
         name='download'
     ),
+    path(
+        'recipes/download_shopping_cart/<str:file_format>/',
+        DownloadCart.as_view({'get': 'download_stream'}),
+        name='download_stream'
+    ),
     path(
         'users/<users_id>/subscribe/',
         SubscribeViewSet.as_view({'post': 'create', 'delete': 'delete'}),
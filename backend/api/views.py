@@ -1,26 +1,59 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import defaultdict
 from http import HTTPStatus
 
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (BooleanField, Count, Exists, F, OuterRef,
+                              Prefetch, Q, Sum, Value, Window)
+from django.db.models.functions import RowNumber
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
+from recipes.feed import get_feed_sources
 from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
-                            Recipe, Subscribe, Tag)
+                            Recipe, SimilarRecipe, Subscribe, Tag)
+from recipes.search import (get_tag_ids_by_slug, recipe_ingredient_index,
+                            search_ingredients)
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
-from rest_framework import permissions, viewsets
+from rest_framework import pagination, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from users.models import User
 
-from .filters import IngredientSearchFilter, RecipeFilters
-from .serializers import (CartSerializer, FavoriteSerializer,
-                          IngredientSerializer, RecipeSerializer,
-                          RecipeSerializerPost, RegistrationSerializer,
-                          SubscriptionSerializer, TagSerializer)
+from .cache import query_cache_key
+from .conditional import conditional_on
+from .filters import (COOKING_TIME_BUCKETS, TAGS_MATCH_ALL,
+                      IngredientSearchFilter, RecipeFilters)
+from .paginator import FeedKeysetPagination, RecipeKeysetPagination
+from .serializers import (CartSerializer, CookableRecipeSerializer,
+                          FavoriteSerializer, IngredientSerializer,
+                          RecipeSerializer, RecipeSerializerPost,
+                          RegistrationSerializer, SubscriptionSerializer,
+                          TagSerializer)
+
+PDF_FONT_NAME = 'List'
+CART_STREAM_CONTENT_TYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
+PDF_FONT_PATH = os.path.join(settings.BASE_DIR, 'data', 'List.ttf')
+
+
+def register_pdf_font():
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, PDF_FONT_PATH))
 
 
 class CreateUserView(UserViewSet):
@@ -55,37 +88,265 @@ class ListFollowViewSet(viewsets.ModelViewSet):
     serializer_class = SubscriptionSerializer
 
     def get_queryset(self):
-        return get_list_or_404(User, following__user=self.request.user)
-
-
+        return User.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            subscribed=Value(True, output_field=BooleanField())
+        ).order_by('id')
+
+    def get_recipes_preview(self, authors):
+        """Newest recipes of every author on the page in a single query."""
+        queryset = Recipe.objects.filter(author__in=authors).defer(
+            'search_vector'
+        )
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit:
+            try:
+                recipes_limit = pagination._positive_int(
+                    recipes_limit, strict=True
+                )
+            except ValueError:
+                raise ValidationError(
+                    {'recipes_limit': 'Must be a positive integer.'}
+                )
+            ranked = queryset.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('author_id')],
+                    order_by=[F('pub_date').desc(), F('id').desc()]
+                )
+            ).order_by()
+            sql, params = ranked.query.sql_with_params()
+            queryset = Recipe.objects.raw(
+                f'SELECT * FROM ({sql}) ranked '
+                f'WHERE row_number <= %s ORDER BY row_number',
+                (*params, recipes_limit)
+            )
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        recipes = defaultdict(list)
+        for recipe in queryset:
+            recipes[recipe.author_id].append(recipe)
+        return recipes
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        authors = page if page is not None else self.get_queryset()
+        context = self.get_serializer_context()
+        context['recipes'] = self.get_recipes_preview(authors)
+        serializer = self.get_serializer(authors, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+@conditional_on(Tag, name='list')
+@conditional_on(Tag, name='retrieve')
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
+@conditional_on(Recipe, Tag, Ingredient, per_user=True, name='retrieve')
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_class = RecipeFilters
     filter_backends = [DjangoFilterBackend, ]
 
+    @property
+    def paginator(self):
+        """Switch the list to keyset pagination when asked for a cursor."""
+        if not hasattr(self, '_paginator'):
+            if (
+                self.action == 'list'
+                and RecipeKeysetPagination.cursor_query_param
+                in self.request.query_params
+            ):
+                self._paginator = RecipeKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = self.queryset.defer('search_vector').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipes',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+        if user.is_anonymous:
+            return queryset.select_related('author').annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField())
+            )
+        return queryset.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate(
+                    subscribed=Exists(
+                        Subscribe.objects.filter(
+                            user=user, following=OuterRef('pk')
+                        )
+                    )
+                )
+            )
+        ).annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Cart.objects.filter(user=user, recipe=OuterRef('pk'))
+            )
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False)
+    def facets(self, request):
+        cache_key = query_cache_key('recipe_facets', request)
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = self.get_facets(request)
+            cache.set(
+                cache_key, facets, settings.RECIPE_FACETS_CACHE_TIMEOUT
+            )
+        return Response(facets)
+
+    def get_facets(self, request):
+        """Tag counts ignore selected tags, buckets and total honour them."""
+        data = request.query_params.copy()
+        data.pop('tags', None)
+        filterset = RecipeFilters(
+            data, queryset=self.get_queryset(), request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        slugs = [slug for slug in request.query_params.getlist('tags') if slug]
+        selected = Q()
+        if slugs:
+            selected = RecipeFilters.tags_condition(
+                slugs, data.get('tags_match') == TAGS_MATCH_ALL
+            )
+            if selected is None:
+                selected = Q(pk__in=[])
+        tag_ids_by_slug = get_tag_ids_by_slug()
+        aggregates = {'total': Count('pk', filter=selected)}
+        for slug, tag_id in tag_ids_by_slug.items():
+            aggregates[f'tag_{tag_id}'] = Count(
+                'pk', filter=RecipeFilters.tags_condition([slug])
+            )
+        bounds = (0, *COOKING_TIME_BUCKETS, None)
+        for index, (lower, upper) in enumerate(zip(bounds, bounds[1:])):
+            bucket = Q(cooking_time__gt=lower)
+            if upper is not None:
+                bucket &= Q(cooking_time__lte=upper)
+            aggregates[f'time_{index}'] = Count(
+                'pk', filter=selected & bucket
+            )
+        counts = Recipe.objects.filter(
+            pk__in=filterset.qs.order_by().values('pk')
+        ).order_by().aggregate(**aggregates)
+        return {
+            'count': counts['total'],
+            'tags': [
+                {'id': tag_id, 'slug': slug, 'count': counts[f'tag_{tag_id}']}
+                for slug, tag_id in sorted(tag_ids_by_slug.items())
+            ],
+            'cooking_time': [
+                {
+                    'min': lower + 1,
+                    'max': upper,
+                    'count': counts[f'time_{index}'],
+                }
+                for index, (lower, upper) in enumerate(zip(bounds, bounds[1:]))
+            ],
+        }
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Neighbours precomputed by the build_similar_recipes command."""
+        neighbours = list(SimilarRecipe.objects.filter(
+            recipe=self.get_object()
+        ).order_by('rank').values_list('similar_id', flat=True))
+        recipes = self.get_queryset().in_bulk(neighbours)
+        serializer = self.get_serializer(
+            [recipes[id] for id in neighbours if id in recipes], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=[permissions.IsAuthenticated])
+    def feed(self, request):
+        """Newest recipes of the authors the user follows."""
+        paginator = FeedKeysetPagination()
+        rows = paginator.paginate_queryset(
+            get_feed_sources(request.user), request, self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in rows]
+        )
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for _, recipe_id in rows
+             if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def cookable(self, request):
+        """Recipes ranked by how many of their ingredients the user has."""
+        ingredient_ids = []
+        for value in request.query_params.getlist('ingredients'):
+            for item in value.split(','):
+                if not item.isdigit():
+                    raise ValidationError(
+                        {'ingredients': f'Invalid ingredient id: {item}'}
+                    )
+                ingredient_ids.append(int(item))
+        if not ingredient_ids:
+            raise ValidationError(
+                {'ingredients': 'Select at least one ingredient.'}
+            )
+        page = self.paginate_queryset(
+            recipe_ingredient_index.rank(ingredient_ids)
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        result = []
+        for recipe_id, matched, total in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.ingredients_matched = matched
+            recipe.ingredients_total = total
+            result.append(recipe)
+        serializer = CookableRecipeSerializer(
+            result, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
         return RecipeSerializerPost
 
 
+@conditional_on(Ingredient, name='list')
+@conditional_on(Ingredient, name='retrieve')
 class IngredientViewSet(viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = IngredientSerializer
-    filter_backends = (DjangoFilterBackend, IngredientSearchFilter)
     pagination_class = None
-    search_fields = ['^name', ]
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientSearchFilter.search_param)
+        return Response(search_ingredients(name or ''))
 
 
 class BaseFavoriteCartViewSet(viewsets.ModelViewSet):
@@ -121,30 +382,66 @@ class FavoriteViewSet(BaseFavoriteCartViewSet):
     model = Favorite
 
 
+class Echo:
+    """File-like object that hands written rows back to the caller."""
+
+    def write(self, value):
+        return value
+
+
 class DownloadCart(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
+    @staticmethod
+    def stream_txt(items):
+        for number, item in enumerate(items, start=1):
+            yield (
+                f'{number}. {item["ingredient__name"]} - '
+                f'{item["ingredient_total"]}'
+                f' {item["ingredient__measurement_unit"]}\n'
+            )
+
+    @staticmethod
+    def stream_csv(items):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in items:
+            yield writer.writerow((
+                item['ingredient__name'],
+                item['ingredient__measurement_unit'],
+                item['ingredient_total'],
+            ))
+
+    @staticmethod
+    def stream_json(items):
+        separator = '['
+        for item in items:
+            yield separator + json.dumps({
+                'name': item['ingredient__name'],
+                'measurement_unit': item['ingredient__measurement_unit'],
+                'amount': item['ingredient_total'],
+            }, ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
     @staticmethod
     def canvas_method(dictionary):
-        response = HttpResponse(content_type='application/pdf')
-        response[
-            'Content-Disposition'
-        ] = 'attachment; filename = "shopping_cart.pdf"'
+        buffer = io.BytesIO()
         begin_position_x, begin_position_y = 40, 650
-        sheet = canvas.Canvas(response, pagesize=A4)
-        pdfmetrics.registerFont(TTFont('List', 'data/List.ttf'))
-        sheet.setFont('List', 50)
+        sheet = canvas.Canvas(buffer, pagesize=A4)
+        register_pdf_font()
+        sheet.setFont(PDF_FONT_NAME, 50)
         sheet.setTitle('Список покупок')
         sheet.drawString(
             begin_position_x,
             begin_position_y + 40, 'Список покупок: '
         )
-        sheet.setFont('List', 24)
+        sheet.setFont(PDF_FONT_NAME, 24)
         for number, item in enumerate(dictionary, start=1):
             if begin_position_y < 100:
                 begin_position_y = 700
                 sheet.showPage()
-                sheet.setFont('List', 24)
+                sheet.setFont(PDF_FONT_NAME, 24)
             sheet.drawString(
                 begin_position_x,
                 begin_position_y,
@@ -155,14 +452,47 @@ class DownloadCart(viewsets.ModelViewSet):
             begin_position_y -= 30
         sheet.showPage()
         sheet.save()
-        return response
+        return buffer.getvalue()
 
-    def download(self, request):
-        result = IngredientRecipe.objects.filter(
-            recipe__carts__user=request.user
+    @staticmethod
+    def get_cart_ingredients(user):
+        return IngredientRecipe.objects.filter(
+            recipe__carts__user=user
         ).values(
             'ingredient__name', 'ingredient__measurement_unit'
         ).order_by(
             'ingredient__name'
         ).annotate(ingredient_total=Sum('amount'))
-        return self.canvas_method(result)
+
+    def download_stream(self, request, file_format):
+        if file_format == 'pdf':
+            return self.download(request)
+        if file_format not in CART_STREAM_CONTENT_TYPES:
+            raise Http404
+        stream = getattr(self, f'stream_{file_format}')
+        response = StreamingHttpResponse(
+            stream(self.get_cart_ingredients(request.user).iterator()),
+            content_type=CART_STREAM_CONTENT_TYPES[file_format]
+        )
+        response[
+            'Content-Disposition'
+        ] = f'attachment; filename = "shopping_cart.{file_format}"'
+        return response
+
+    def download(self, request):
+        result = list(self.get_cart_ingredients(request.user))
+        digest = hashlib.sha256(
+            json.dumps(result, ensure_ascii=False).encode()
+        ).hexdigest()
+        cache_key = f'shopping_cart_pdf:{digest}'
+        content = cache.get(cache_key)
+        if content is None:
+            content = self.canvas_method(result)
+            cache.set(
+                cache_key, content, settings.SHOPPING_CART_PDF_CACHE_TIMEOUT
+            )
+        response = HttpResponse(content, content_type='application/pdf')
+        response[
+            'Content-Disposition'
+        ] = 'attachment; filename = "shopping_cart.pdf"'
+        return response
@@ -0,0 +1,83 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.http import HttpResponse
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+REQUESTS = Counter(
+    'foodgram_http_requests_total',
+    'HTTP requests by route, method and status.',
+    ['route', 'method', 'status']
+)
+LATENCY = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'HTTP request latency by route.',
+    ['route']
+)
+DB_QUERIES = Counter(
+    'foodgram_db_queries_total',
+    'SQL queries executed by route.',
+    ['route']
+)
+DB_SECONDS = Counter(
+    'foodgram_db_query_seconds_total',
+    'Time spent in SQL queries by route.',
+    ['route']
+)
+
+
+class QueryStats:
+    """Execute wrapper that counts queries and sums their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record request count, latency and SQL usage per route name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match else UNMATCHED_ROUTE
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        LATENCY.labels(route).observe(duration)
+        DB_QUERIES.labels(route).inc(stats.count)
+        DB_SECONDS.labels(route).inc(stats.duration)
+        return response
+
+
+def metrics(request):
+    """Prometheus exposition, merged across workers in multiprocess mode."""
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
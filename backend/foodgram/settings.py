@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'foodgram.metrics.MetricsMiddleware',
+    'foodgram.timing.ServerTimingMiddleware',
+    'foodgram.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -113,6 +117,42 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "users.User"
 
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+
+INGREDIENT_INDEX_CHECK_INTERVAL = float(os.getenv('INGREDIENT_INDEX_CHECK_INTERVAL', default=5))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=20))
+
+INGREDIENT_SIMILARITY_THRESHOLD = float(os.getenv('INGREDIENT_SIMILARITY_THRESHOLD', default=0.3))
+
+RECIPE_INGREDIENT_INDEX_TTL = int(os.getenv('RECIPE_INGREDIENT_INDEX_TTL', default=60 * 60))
+
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', default=1000))
+
+FEED_FANOUT_BATCH_SIZE = int(os.getenv('FEED_FANOUT_BATCH_SIZE', default=1000))
+
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', default=10))
+
+SIMILAR_RECIPES_PERMUTATIONS = int(os.getenv('SIMILAR_RECIPES_PERMUTATIONS', default=64))
+
+SIMILAR_RECIPES_BANDS = int(os.getenv('SIMILAR_RECIPES_BANDS', default=16))
+
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', default=3 * 24 * 60 * 60))
+
+SLOW_QUERY_THRESHOLD = os.getenv('SLOW_QUERY_THRESHOLD')
+
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', default=500))
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', default=30))
+
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', default=10000))
+
+RECIPE_SEARCH_CONFIG = os.getenv('RECIPE_SEARCH_CONFIG', default='russian')
+
+RECIPE_FACETS_CACHE_TIMEOUT = int(os.getenv('RECIPE_FACETS_CACHE_TIMEOUT', default=30))
+
+SHOPPING_CART_PDF_CACHE_TIMEOUT = int(os.getenv('SHOPPING_CART_PDF_CACHE_TIMEOUT', default=60 * 60))
+
 AUTHENTICATION_BACKENDS = ("django.contrib.auth.backends.ModelBackend",)
 
 REST_FRAMEWORK = {
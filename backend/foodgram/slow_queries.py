@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.db.models import Max
+
+from recipes.models import SlowQuery
+
+from .metrics import UNMATCHED_ROUTE
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_app_frame():
+    """``path:line Class.function`` of the innermost frame in our code."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            filename.startswith(settings.BASE_DIR)
+            and not filename.startswith(PACKAGE_DIR)
+            and 'site-packages' not in filename
+        ):
+            name = frame.f_code.co_name
+            owner = frame.f_locals.get('self', frame.f_locals.get('cls'))
+            if owner is not None:
+                owner = owner if isinstance(owner, type) else type(owner)
+                name = f'{owner.__name__}.{name}'
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.f_lineno} {name}'
+        frame = frame.f_back
+    return ''
+
+
+class SlowQueryLog:
+    """Execute wrapper that keeps queries slower than ``threshold`` ms."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold / 1000
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.entries.append((sql, duration, get_app_frame()))
+
+
+def record_slow_queries(route, entries):
+    """Store the entries and trim the table to SLOW_QUERY_BUFFER_SIZE rows."""
+    SlowQuery.objects.bulk_create([
+        SlowQuery(
+            sql=sql, duration=duration * 1000, route=route[:200],
+            frame=frame[:300]
+        )
+        for sql, duration, frame in entries
+    ])
+    last_id = SlowQuery.objects.aggregate(last_id=Max('id'))['last_id']
+    SlowQuery.objects.filter(
+        id__lte=last_id - settings.SLOW_QUERY_BUFFER_SIZE
+    ).delete()
+
+
+class SlowQueryMiddleware:
+    """Capture SQL slower than SLOW_QUERY_THRESHOLD ms for the admin."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = float(settings.SLOW_QUERY_THRESHOLD)
+
+    def __call__(self, request):
+        log = SlowQueryLog(self.threshold)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(log))
+                return self.get_response(request)
+        finally:
+            if log.entries:
+                self.record(request, log.entries)
+
+    @staticmethod
+    def record(request, entries):
+        match = request.resolver_match
+        try:
+            record_slow_queries(
+                match.view_name if match else UNMATCHED_ROUTE, entries
+            )
+        except DatabaseError:
+            pass
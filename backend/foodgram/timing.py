@@ -0,0 +1,109 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .metrics import QueryStats
+
+SERVER_TIMING_TOGGLE = 'server_timing'
+
+
+class ServerTiming:
+    """Marks of one request split into db, serialize and render phases."""
+
+    def __init__(self):
+        self.queries = QueryStats()
+        self.wrappers = ExitStack()
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self.view_queries_duration = 0.0
+        self.finished = None
+
+    def header(self):
+        db = self.queries.duration
+        metrics = [
+            ('db', db, f'{self.queries.count} queries'),
+        ]
+        if self.view_started is not None:
+            view_finished = self.view_finished or self.finished
+            view_db = (
+                self.view_queries_duration if self.view_finished else db
+            )
+            metrics.append((
+                'serialize', view_finished - self.view_started - view_db,
+                'view and serializers without SQL'
+            ))
+        if self.view_finished is not None:
+            metrics.append((
+                'render',
+                self.finished - self.view_finished
+                - (db - self.view_queries_duration),
+                'renderer'
+            ))
+        metrics.append(('total', self.finished - self.started, 'total'))
+        return ', '.join(
+            f'{name};desc="{description}";dur={duration * 1000:.1f}'
+            for name, duration, description in metrics
+        )
+
+
+class ServerTimingMiddleware:
+    """Server-Timing header for staff, toggled by ``server_timing=1``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def is_requested(request):
+        return (
+            request.GET.get(SERVER_TIMING_TOGGLE) == '1'
+            or request.COOKIES.get(SERVER_TIMING_TOGGLE) == '1'
+        )
+
+    @staticmethod
+    def is_staff(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        authenticators = [
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ]
+        try:
+            user = Request(request, authenticators=authenticators).user
+        except APIException:
+            return False
+        return user is not None and user.is_staff
+
+    def __call__(self, request):
+        if not self.is_requested(request):
+            return self.get_response(request)
+        timing = request.server_timing = ServerTiming()
+        with timing.wrappers:
+            response = self.get_response(request)
+        timing.finished = time.perf_counter()
+        if timing.view_started is not None:
+            response['Server-Timing'] = timing.header()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, 'server_timing', None)
+        if timing is None or not self.is_staff(request):
+            return
+        for connection in connections.all():
+            timing.wrappers.enter_context(
+                connection.execute_wrapper(timing.queries)
+            )
+        timing.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None and timing.view_started is not None:
+            timing.view_finished = time.perf_counter()
+            timing.view_queries_duration = timing.queries.duration
+        return response
@@ -1,7 +1,15 @@
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_wsgi_application()
+
+try:
+    from recipes.search import ingredient_index, recipe_ingredient_index
+    ingredient_index.build()
+    recipe_ingredient_index.build()
+except DatabaseError:
+    pass
@@ -1,14 +1,44 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
 from users.models import User
 
 from .models import (Cart, Favorite, Ingredient, IngredientRecipe, Recipe,
-                     Subscribe, Tag, TagRecipe)
+                     SlowQuery, Subscribe, Tag, TagRecipe)
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the PostgreSQL planner estimate for big unfiltered changelists."""
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [query.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-empty-'
 
 
 class IngredientRecipeInline(admin.TabularInline):
     model = IngredientRecipe
     extra = 0
+    autocomplete_fields = ('ingredient',)
 
 
 class TagRecipeInline(admin.TabularInline):
@@ -16,18 +46,18 @@ class TagRecipeInline(admin.TabularInline):
     extra = 0
 
 
-class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'id')
+class UserAdmin(LargeTableAdmin):
+    list_display = ('username', 'email', 'id', 'recipes_count')
     search_fields = ('username', 'email')
-    empty_value_display = '-empty-'
-    list_filter = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
+    ordering = ('id',)
 
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
     search_fields = ('name', )
     empty_value_display = '-empty-'
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -37,37 +67,48 @@ class TagAdmin(admin.ModelAdmin):
     list_filter = ('name',)
 
 
-class CartAdmin(admin.ModelAdmin):
+class CartAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe', 'id')
-    search_fields = ('user', )
-    empty_value_display = '-empty-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'user__email', 'recipe__name')
 
 
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe')
-    search_fields = ('user', )
-    empty_value_display = '-empty-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'user__email', 'recipe__name')
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     inlines = (IngredientRecipeInline, TagRecipeInline,)
     list_display = ('name', 'author', 'cooking_time',
-                    'id', 'count_favorite', 'pub_date')
-    search_fields = ('name', 'author', 'tags')
-    empty_value_display = '-empty-'
-    list_filter = ('name', 'author', 'tags')
+                    'id', 'favorites_count', 'carts_count', 'pub_date')
+    list_select_related = ('author',)
+    autocomplete_fields = ('author',)
+    search_fields = ('name', 'author__username')
+    list_filter = ('tags',)
 
-    def count_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
 
-
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(LargeTableAdmin):
     list_display = ('user', 'following')
-    search_fields = ('user', )
-    empty_value_display = '-empty-'
-    list_filter = ('user',)
+    list_select_related = ('user', 'following')
+    autocomplete_fields = ('user', 'following')
+    search_fields = ('user__username', 'following__username')
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created', 'duration', 'route', 'frame')
+    list_filter = ('route',)
+    search_fields = ('sql', 'frame')
+    readonly_fields = ('created', 'duration', 'route', 'frame', 'sql')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(Cart, CartAdmin)
@@ -77,3 +118,4 @@ admin.site.register(Subscribe, SubscribeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Recipe, RecipeAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
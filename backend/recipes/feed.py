@@ -0,0 +1,112 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+from users.models import User
+
+from .models import FeedEntry, Recipe, Subscribe
+
+RESTORE_FAN_OUT = '''
+INSERT INTO {feed} (user_id, author_id, recipe_id, pub_date)
+SELECT subscribe.user_id, recipe.author_id, recipe.id, recipe.pub_date
+FROM {subscribe} AS subscribe
+JOIN {recipe} AS recipe ON recipe.author_id = subscribe.following_id
+WHERE subscribe.following_id = %s
+ON CONFLICT DO NOTHING
+'''
+
+
+def is_fanned_out(author_id):
+    """Authors above FEED_FANOUT_THRESHOLD followers merge at read time."""
+    followers_count = User.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    return (
+        followers_count is not None
+        and followers_count <= settings.FEED_FANOUT_THRESHOLD
+    )
+
+
+def insert_in_batches(entries):
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'pub_date'
+    ).first()
+    if recipe is None or not is_fanned_out(recipe['author_id']):
+        return
+    follower_ids = Subscribe.objects.filter(
+        following_id=recipe['author_id']
+    ).values_list('user_id', flat=True).order_by().iterator(
+        chunk_size=settings.FEED_FANOUT_BATCH_SIZE
+    )
+    insert_in_batches(
+        FeedEntry(
+            user_id=user_id,
+            author_id=recipe['author_id'],
+            recipe_id=recipe_id,
+            pub_date=recipe['pub_date']
+        )
+        for user_id in follower_ids
+    )
+
+
+def add_author_to_feed(user_id, author_id):
+    if not is_fanned_out(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    ).order_by().iterator(chunk_size=settings.FEED_FANOUT_BATCH_SIZE)
+    insert_in_batches(
+        FeedEntry(
+            user_id=user_id,
+            author_id=author_id,
+            recipe_id=recipe_id,
+            pub_date=pub_date
+        )
+        for recipe_id, pub_date in recipes
+    )
+
+
+def restore_fan_out(author_id):
+    """Backfill follower timelines once the author drops to the threshold."""
+    if not is_fanned_out(author_id):
+        return
+    with connections[FeedEntry.objects.db].cursor() as cursor:
+        cursor.execute(
+            RESTORE_FAN_OUT.format(
+                feed=FeedEntry._meta.db_table,
+                subscribe=Subscribe._meta.db_table,
+                recipe=Recipe._meta.db_table,
+            ),
+            [author_id]
+        )
+
+
+def remove_author_from_feed(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def get_feed_sources(user):
+    """The user's timeline plus recipes of authors merged at read time."""
+    sources = [FeedEntry.objects.filter(user=user)]
+    merged_authors = list(Subscribe.objects.filter(
+        user=user,
+        following__followers_count__gt=settings.FEED_FANOUT_THRESHOLD
+    ).values_list('following_id', flat=True))
+    if merged_authors:
+        sources.append(
+            Recipe.objects.filter(author_id__in=merged_authors).annotate(
+                recipe_id=F('id')
+            )
+        )
+    return sources
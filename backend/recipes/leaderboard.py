@@ -0,0 +1,53 @@
+import math
+import time
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Exp, Greatest, Ln
+
+from .models import LeaderboardEntry, Recipe
+
+TRENDING_FLOOR = 1e-9
+
+
+def trending_offset(timestamp=None):
+    """ln of the weight an event gets at ``timestamp``, added to ln(score)."""
+    if timestamp is None:
+        timestamp = time.time()
+    return timestamp * math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def record_event(recipe_id, delta):
+    """Removals subtract a fresh event; scores floor at TRENDING_FLOOR."""
+    offset = trending_offset()
+    decayed = Exp(Greatest(
+        F('trending') - offset, Value(math.log(TRENDING_FLOOR))
+    ))
+    LeaderboardEntry.objects.filter(recipe_id=recipe_id).update(
+        popularity=Greatest(F('popularity') + delta, 0),
+        trending=Ln(Greatest(decayed + delta, Value(TRENDING_FLOOR))) + offset
+    )
+
+
+def compact_leaderboard():
+    """Resync popularity, add missing entries, zero dead trending scores."""
+    added = LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(recipe_id=recipe_id)
+            for recipe_id in Recipe.objects.filter(
+                leaderboard__isnull=True
+            ).values_list('id', flat=True)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    LeaderboardEntry.objects.update(popularity=Subquery(
+        Recipe.objects.filter(pk=OuterRef('recipe_id')).values(
+            total=F('favorites_count') + F('carts_count')
+        )
+    ))
+    reset = LeaderboardEntry.objects.filter(
+        trending__gt=0,
+        trending__lt=trending_offset() + math.log(TRENDING_FLOOR)
+    ).update(trending=0)
+    return len(added), reset
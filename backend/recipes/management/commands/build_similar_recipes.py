@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.similar import refresh_similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh the precomputed similar recipes. Only recipes whose '
+        'ingredients or tags changed since the last run, and their '
+        'neighbours, are recomputed unless --full is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute signatures and neighbours of every recipe.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        changed, refreshed = refresh_similar_recipes(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{changed} recipes changed, refreshed neighbours of '
+            f'{refreshed} in {time.monotonic() - started:.2f}s.'
+        ))
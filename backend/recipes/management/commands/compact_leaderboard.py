@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.leaderboard import compact_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        'Compact the popular recipes leaderboard: resync popularity with '
+        'the recipe counters and reset trending scores that decayed away.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        added, reset = compact_leaderboard()
+        self.stdout.write(self.style.SUCCESS(
+            f'Added {added} entries, reset {reset} trending scores.'
+        ))
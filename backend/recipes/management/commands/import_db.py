@@ -1,26 +1,135 @@
+import csv
+import io
 import json
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient
+from recipes.versions import bump_version
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(file):
+    """Yield the items of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_CHUNK_SIZE)
+    while buffer.isspace():
+        buffer = file.read(READ_CHUNK_SIZE)
+    buffer = buffer.lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Expected a JSON array of ingredients.')
+    buffer = buffer[1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Malformed JSON ingredients file.')
+            chunk = file.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
+
+def iter_csv_rows(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
 
 
 class Command(BaseCommand):
+    help = (
+        'Load ingredients from a JSON or CSV file. Rows that already exist '
+        '(same name and measurement unit) are skipped, so re-runs are safe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument(
+            '--format', choices=('json', 'csv'),
+            help='File format, guessed from the extension by default.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
 
     def handle(self, *args, **options):
-        with open(
-            'data/ingredients.json', encoding='utf-8'
-        ) as json_file:
-            ingredients = json.load(json_file)
-            for ingredient in ingredients:
-                name = ingredient['name']
-                measurement_unit = ingredient['measurement_unit']
-                Ingredient.objects.create(
-                    name=name,
-                    measurement_unit=measurement_unit
-                )
-
-
-app = Command()
-app.handle()
-print('Ingredients successfully uploaded')
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(
+            path
+        )[1].lstrip('.').lower()
+        readers = {'json': iter_json_array, 'csv': iter_csv_rows}
+        if file_format not in readers:
+            raise CommandError(f'Unsupported file format: {path}')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        started = time.monotonic()
+        before = Ingredient.objects.count()
+        processed = 0
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            rows = readers[file_format](file)
+            insert_batch = (
+                self.copy_batch if connection.vendor == 'postgresql'
+                else self.bulk_create_batch
+            )
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                insert_batch(batch)
+                processed += len(batch)
+        created = Ingredient.objects.count() - before
+        elapsed = max(time.monotonic() - started, 1e-6)
+        bump_version(Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} rows, created {created} ingredients '
+            f'in {elapsed:.2f}s ({processed / elapsed:.0f} rows/s).'
+        ))
+
+    @staticmethod
+    def bulk_create_batch(batch):
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ],
+            ignore_conflicts=True
+        )
+
+    @staticmethod
+    def copy_batch(batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE IF NOT EXISTS import_ingredient '
+                '(name varchar(200), measurement_unit varchar(200)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY import_ingredient (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM import_ingredient '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            cursor.execute('TRUNCATE import_ingredient')
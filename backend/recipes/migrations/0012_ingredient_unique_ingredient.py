@@ -0,0 +1,50 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        extra_ids = list(Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=keep_id).values_list('id', flat=True))
+        recipes_with_kept = IngredientRecipe.objects.filter(
+            ingredient_id=keep_id
+        ).values('recipe_id')
+        IngredientRecipe.objects.filter(
+            ingredient_id__in=extra_ids, recipe_id__in=recipes_with_kept
+        ).delete()
+        for ingredientrecipe in IngredientRecipe.objects.filter(
+            ingredient_id__in=extra_ids
+        ).order_by('recipe_id', 'id'):
+            if IngredientRecipe.objects.filter(
+                ingredient_id=keep_id, recipe_id=ingredientrecipe.recipe_id
+            ).exists():
+                ingredientrecipe.delete()
+            else:
+                ingredientrecipe.ingredient_id = keep_id
+                ingredientrecipe.save(update_fields=['ingredient'])
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_alter_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.6 on 2026-10-17 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100, unique=True, verbose_name='Model Label')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Version')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Date Modified')),
+            ],
+            options={
+                'verbose_name': 'Model Version',
+                'verbose_name_plural': 'Model Versions',
+            },
+        ),
+    ]
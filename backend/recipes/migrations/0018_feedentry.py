@@ -0,0 +1,75 @@
+# Generated by Django 3.2.6 on 2026-10-17 04:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+FILL_FEED = '''
+INSERT INTO {feed} (user_id, author_id, recipe_id, pub_date)
+SELECT subscribe.user_id, recipe.author_id, recipe.id, recipe.pub_date
+FROM {subscribe} AS subscribe
+JOIN {recipe} AS recipe ON recipe.author_id = subscribe.following_id
+JOIN {user} AS author ON author.id = recipe.author_id
+WHERE author.followers_count <= %s
+'''
+
+
+def fill_feed(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscribe = apps.get_model('recipes', 'Subscribe')
+    User.objects.update(followers_count=Coalesce(
+        Subquery(
+            Subscribe.objects.filter(
+                following=OuterRef('pk')
+            ).order_by().values('following').annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    ))
+    schema_editor.execute(
+        FILL_FEED.format(
+            feed=apps.get_model('recipes', 'FeedEntry')._meta.db_table,
+            subscribe=Subscribe._meta.db_table,
+            recipe=apps.get_model('recipes', 'Recipe')._meta.db_table,
+            user=User._meta.db_table,
+        ),
+        [settings.FEED_FANOUT_THRESHOLD]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0017_ingredient_name_trgm_idx'),
+        ('users', '0004_user_followers_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Date Published')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Feed Entry',
+                'verbose_name_plural': 'Feed Entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
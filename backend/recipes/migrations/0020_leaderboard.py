@@ -0,0 +1,49 @@
+# Generated by Django 3.2.6 on 2026-10-17 04:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_LEADERBOARD = '''
+INSERT INTO {leaderboard} (recipe_id, popularity, trending)
+SELECT id, favorites_count + carts_count, 0 FROM {recipe}
+'''
+
+
+def fill_leaderboard(apps, schema_editor):
+    schema_editor.execute(FILL_LEADERBOARD.format(
+        leaderboard=apps.get_model(
+            'recipes', 'LeaderboardEntry'
+        )._meta.db_table,
+        recipe=apps.get_model('recipes', 'Recipe')._meta.db_table,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_similar_recipes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard', serialize=False, to='recipes.recipe', verbose_name='Recipe')),
+                ('popularity', models.PositiveIntegerField(default=0, verbose_name='Popularity')),
+                ('trending', models.FloatField(default=0, verbose_name='Trending Score')),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Entry',
+                'verbose_name_plural': 'Leaderboard',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['-popularity', '-recipe'], name='leaderboard_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['-trending', '-recipe'], name='leaderboard_trending_idx'),
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
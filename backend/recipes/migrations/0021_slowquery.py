@@ -0,0 +1,29 @@
+# Generated by Django 3.2.6 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('duration', models.FloatField(verbose_name='Duration, ms')),
+                ('route', models.CharField(max_length=200, verbose_name='Route')),
+                ('frame', models.CharField(max_length=300, verbose_name='Issued By')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Date Captured')),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ('-id',),
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.6 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.PositiveBigIntegerField(verbose_name='Recipe ID')),
+            ],
+            options={
+                'verbose_name': 'Recipe Change',
+                'verbose_name_plural': 'Recipe Changes',
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -20,6 +22,19 @@ class Ingredient(models.Model):
         verbose_name = 'Ingredient'
         verbose_name_plural = 'Ingredients'
         ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
+        indexes = [
+            GinIndex(
+                fields=['name'],
+                name='ingredient_name_trgm_idx',
+                opclasses=['gin_trgm_ops']
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -93,10 +108,38 @@ class Recipe(models.Model):
         verbose_name='Date Created'
     )
 
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Favorites Count'
+    )
+
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Carts Count'
+    )
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Search Vector'
+    )
+
     class Meta:
         ordering = ('-pub_date', )
         verbose_name = 'Recipe'
         verbose_name_plural = 'Recipes'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -247,3 +290,220 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.recipe} {self.user}'
+
+
+class ModelVersion(models.Model):
+    label = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Model Label'
+    )
+
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Version'
+    )
+
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Date Modified'
+    )
+
+    class Meta:
+        verbose_name = 'Model Version'
+        verbose_name_plural = 'Model Versions'
+
+    def __str__(self):
+        return f'{self.label} {self.version}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='User'
+    )
+
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Author'
+    )
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Recipe'
+    )
+
+    pub_date = models.DateTimeField(
+        verbose_name='Date Published'
+    )
+
+    class Meta:
+        verbose_name = 'Feed Entry'
+        verbose_name_plural = 'Feed Entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'
+
+
+class RecipeSignature(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Recipe'
+    )
+
+    fingerprint = models.CharField(
+        max_length=40,
+        verbose_name='Fingerprint'
+    )
+
+    signature = models.BinaryField(
+        verbose_name='MinHash Signature'
+    )
+
+    class Meta:
+        verbose_name = 'Recipe Signature'
+        verbose_name_plural = 'Recipe Signatures'
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.fingerprint}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Recipe'
+    )
+
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Similar Recipe'
+    )
+
+    score = models.FloatField(
+        verbose_name='Score'
+    )
+
+    rank = models.PositiveSmallIntegerField(
+        verbose_name='Rank'
+    )
+
+    class Meta:
+        verbose_name = 'Similar Recipe'
+        verbose_name_plural = 'Similar Recipes'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'rank'],
+                name='unique_similar_recipe_rank'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.similar}'
+
+
+class LeaderboardEntry(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='leaderboard',
+        verbose_name='Recipe'
+    )
+
+    popularity = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Popularity'
+    )
+
+    trending = models.FloatField(
+        default=0,
+        verbose_name='Trending Score'
+    )
+
+    class Meta:
+        verbose_name = 'Leaderboard Entry'
+        verbose_name_plural = 'Leaderboard'
+        indexes = [
+            models.Index(
+                fields=['-popularity', '-recipe'],
+                name='leaderboard_popularity_idx'
+            ),
+            models.Index(
+                fields=['-trending', '-recipe'],
+                name='leaderboard_trending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.popularity}'
+
+
+class SlowQuery(models.Model):
+    sql = models.TextField(
+        verbose_name='SQL'
+    )
+
+    duration = models.FloatField(
+        verbose_name='Duration, ms'
+    )
+
+    route = models.CharField(
+        max_length=200,
+        verbose_name='Route'
+    )
+
+    frame = models.CharField(
+        max_length=300,
+        verbose_name='Issued By'
+    )
+
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Date Captured'
+    )
+
+    class Meta:
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+        ordering = ('-id',)
+
+    def __str__(self):
+        return f'{self.route} {self.duration:.1f} ms'
+
+
+class RecipeChange(models.Model):
+    recipe_id = models.PositiveBigIntegerField(
+        verbose_name='Recipe ID'
+    )
+
+    class Meta:
+        verbose_name = 'Recipe Change'
+        verbose_name_plural = 'Recipe Changes'
+
+    def __str__(self):
+        return f'{self.id} {self.recipe_id}'
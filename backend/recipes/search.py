@@ -0,0 +1,352 @@
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import (Case, Exists, F, IntegerField, Max, OuterRef, Q,
+                              Subquery, Value, When)
+from django.db.models.functions import Coalesce
+
+from .models import Ingredient, IngredientRecipe, RecipeChange, Tag
+from .versions import get_version
+
+TAG_MAP_CACHE_KEY = 'recipes:tag_ids_by_slug'
+TAG_MAP_CACHE_TIMEOUT = 60
+RECIPE_CHANGES_MAX_REPLAY = 1000
+RECIPE_CHANGES_GAP_GRACE = 5
+WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Trigrams of ``text`` split the way pg_trgm does it."""
+    result = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        result.update(
+            padded[i:i + 3] for i in range(len(padded) - 2)
+        )
+    return result
+
+
+class IngredientPrefixIndex:
+    """Per-process sorted ingredient names, rebuilt on a new DB version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = ([], [], {}, [])
+        self._version = None
+        self._built_at = None
+        self._checked_at = None
+
+    def build(self):
+        version = get_version(Ingredient)
+        entries = sorted(
+            (name.lower(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).order_by().iterator()
+        )
+        postings = defaultdict(list)
+        trigram_counts = []
+        for position, entry in enumerate(entries):
+            entry_trigrams = trigrams(entry[0])
+            trigram_counts.append(len(entry_trigrams))
+            for trigram in entry_trigrams:
+                postings[trigram].append(position)
+        snapshot = (
+            [entry[0] for entry in entries],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in entries
+            ],
+            dict(postings),
+            trigram_counts,
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+            self._built_at = self._checked_at = time.monotonic()
+
+    def is_stale(self):
+        if self._built_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._built_at > settings.INGREDIENT_INDEX_TTL:
+            return True
+        if now - self._checked_at < settings.INGREDIENT_INDEX_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        return get_version(Ingredient) != self._version
+
+    def sync(self):
+        if self.is_stale():
+            self.build()
+
+    def search(self, prefix=''):
+        keys, rows, _, _ = self._snapshot
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return list(rows)
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\U0010ffff', lo=start)
+        return rows[start:end]
+
+    def similar(self, text, threshold, limit):
+        """Rows ranked by trigram similarity to ``text``, best first."""
+        _, rows, postings, counts = self._snapshot
+        query = trigrams(text)
+        shared = Counter()
+        for trigram in query:
+            shared.update(postings.get(trigram, ()))
+        ranked = []
+        for position, common in shared.items():
+            similarity = common / (len(query) + counts[position] - common)
+            if similarity >= threshold:
+                ranked.append((-similarity, position))
+        ranked.sort()
+        return [rows[position] for _, position in ranked[:limit]]
+
+
+ingredient_index = IngredientPrefixIndex()
+
+
+def search_ingredients(name):
+    """Prefix matches first, then typo-tolerant matches by similarity."""
+    ingredient_index.sync()
+    name = name.strip()
+    if not name:
+        return ingredient_index.search()
+    limit = settings.INGREDIENT_SEARCH_LIMIT
+    threshold = settings.INGREDIENT_SIMILARITY_THRESHOLD
+    result = ingredient_index.search(name)[:limit]
+    if len(result) == limit:
+        return result
+    found = {row['id'] for row in result}
+    if connection.vendor == 'postgresql':
+        similar = Ingredient.objects.annotate(
+            similarity=TrigramSimilarity('name', name)
+        ).filter(
+            name__trigram_similar=name, similarity__gte=threshold
+        ).exclude(id__in=found).order_by('-similarity', 'name').values(
+            'id', 'name', 'measurement_unit'
+        )[:limit - len(result)]
+    else:
+        similar = (
+            row for row in ingredient_index.similar(name, threshold, limit)
+            if row['id'] not in found
+        )
+    result.extend(similar)
+    return result[:limit]
+
+
+def mark_recipe_changed(recipe_id):
+    """Append a saved or deleted recipe to the change log table."""
+    change = RecipeChange.objects.create(recipe_id=recipe_id)
+    RecipeChange.objects.filter(
+        id__lte=change.id - 2 * RECIPE_CHANGES_MAX_REPLAY
+    ).delete()
+
+
+def get_last_recipe_change():
+    return RecipeChange.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+
+class RecipeIngredientIndex:
+    """Per-process ingredient to recipe postings, synced from RecipeChange."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._recipe_ingredients = {}
+        self._seq = None
+        self._applied = set()
+        self._gap = None
+        self._built_at = None
+
+    def build(self):
+        seq = get_last_recipe_change()
+        postings = defaultdict(lambda: array('q'))
+        recipe_ingredients = defaultdict(set)
+        rows = IngredientRecipe.objects.values_list(
+            'ingredient_id', 'recipe_id'
+        ).order_by('ingredient_id', 'recipe_id').iterator()
+        for ingredient_id, recipe_id in rows:
+            posting = postings[ingredient_id]
+            if not posting or posting[-1] != recipe_id:
+                posting.append(recipe_id)
+            recipe_ingredients[recipe_id].add(ingredient_id)
+        with self._lock:
+            self._postings = dict(postings)
+            self._recipe_ingredients = {
+                recipe_id: tuple(sorted(ingredient_ids))
+                for recipe_id, ingredient_ids in recipe_ingredients.items()
+            }
+            self._seq = seq
+            self._applied = set()
+            self._gap = None
+            self._built_at = time.monotonic()
+
+    def refresh(self, recipe_ids):
+        current = defaultdict(set)
+        for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].add(ingredient_id)
+        with self._lock:
+            for recipe_id in recipe_ids:
+                for ingredient_id in self._recipe_ingredients.pop(
+                    recipe_id, ()
+                ):
+                    posting = self._postings[ingredient_id]
+                    position = bisect_left(posting, recipe_id)
+                    if (
+                        position < len(posting)
+                        and posting[position] == recipe_id
+                    ):
+                        del posting[position]
+                if not current[recipe_id]:
+                    continue
+                self._recipe_ingredients[recipe_id] = tuple(
+                    sorted(current[recipe_id])
+                )
+                for ingredient_id in current[recipe_id]:
+                    posting = self._postings.setdefault(
+                        ingredient_id, array('q')
+                    )
+                    position = bisect_left(posting, recipe_id)
+                    if (
+                        position == len(posting)
+                        or posting[position] != recipe_id
+                    ):
+                        posting.insert(position, recipe_id)
+
+    def sync(self):
+        if (
+            self._built_at is None
+            or time.monotonic() - self._built_at
+            > settings.RECIPE_INGREDIENT_INDEX_TTL
+        ):
+            self.build()
+            return
+        changes = list(RecipeChange.objects.filter(
+            id__gt=self._seq
+        ).order_by('id').values_list('id', 'recipe_id')[
+            :RECIPE_CHANGES_MAX_REPLAY + 1
+        ])
+        if not changes:
+            return
+        if changes[-1][0] - self._seq > RECIPE_CHANGES_MAX_REPLAY:
+            self.build()
+            return
+        recipe_ids = {
+            recipe_id for change_id, recipe_id in changes
+            if change_id not in self._applied
+        }
+        if recipe_ids:
+            self.refresh(recipe_ids)
+        self.advance(changes)
+
+    def advance(self, changes):
+        seq = self._seq
+        for change_id, _ in changes:
+            if change_id != seq + 1:
+                break
+            seq = change_id
+        last_id = changes[-1][0]
+        if seq != last_id:
+            # A hole is an uncommitted insert or a skipped id: wait briefly.
+            now = time.monotonic()
+            if self._gap is None or self._gap[0] != seq + 1:
+                self._gap = (seq + 1, now)
+            elif now - self._gap[1] > RECIPE_CHANGES_GAP_GRACE:
+                seq = last_id
+        if seq == last_id:
+            self._gap = None
+        self._seq = seq
+        self._applied = {
+            change_id for change_id, _ in changes if change_id > seq
+        }
+
+    def rank(self, ingredient_ids):
+        """``(recipe_id, matched, total)``, best matched share first."""
+        self.sync()
+        hits = Counter()
+        with self._lock:
+            for ingredient_id in set(ingredient_ids):
+                hits.update(self._postings.get(ingredient_id, ()))
+            ranked = [
+                (recipe_id, matched, len(self._recipe_ingredients[recipe_id]))
+                for recipe_id, matched in hits.items()
+            ]
+        ranked.sort(key=lambda row: (
+            -row[1] / row[2], row[2] - row[1], -row[0]
+        ))
+        return ranked
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
+
+
+def get_tag_ids_by_slug():
+    cache_key = f'{TAG_MAP_CACHE_KEY}:{get_version(Tag)}'
+    tag_ids = cache.get(cache_key)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(cache_key, tag_ids, TAG_MAP_CACHE_TIMEOUT)
+    return tag_ids
+
+
+def recipe_search_vector():
+    """Weighted tsvector of a recipe: name, then text, then ingredients."""
+    config = settings.RECIPE_SEARCH_CONFIG
+    ingredient_names = Subquery(
+        IngredientRecipe.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            names=StringAgg('ingredient__name', delimiter=' ')
+        ).values('names')
+    )
+    return (
+        SearchVector('name', weight='A', config=config)
+        + SearchVector('text', weight='B', config=config)
+        + SearchVector(
+            Coalesce(ingredient_names, Value('')), weight='C', config=config
+        )
+    )
+
+
+def refresh_search_vectors(queryset):
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset.update(search_vector=recipe_search_vector())
+
+
+def search_recipes(queryset, text):
+    """Filter recipes by ``text`` and order them by relevance."""
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(
+            text, config=settings.RECIPE_SEARCH_CONFIG,
+            search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-pub_date', '-id')
+    ingredient_match = Exists(IngredientRecipe.objects.filter(
+        recipe=OuterRef('pk'), ingredient__name__icontains=text
+    ))
+    return queryset.annotate(
+        search_rank=Case(
+            When(name__icontains=text, then=Value(3)),
+            When(text__icontains=text, then=Value(2)),
+            When(Q(ingredient_match), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    ).filter(search_rank__gt=0).order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,154 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+
+from .feed import (add_author_to_feed, fan_out_recipe, remove_author_from_feed,
+                   restore_fan_out)
+from .leaderboard import record_event
+from .models import (Cart, Favorite, Ingredient, LeaderboardEntry, Recipe,
+                     Subscribe, Tag)
+from .search import mark_recipe_changed, refresh_search_vectors
+from .versions import bump_version
+
+VERSIONED_MODELS = (Tag, Ingredient, Recipe)
+LOGIN_FIELDS = frozenset({'last_login'})
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    Cart: 'carts_count',
+}
+
+
+def shift_counter(queryset, field, delta):
+    queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def bump_model_version(sender, **kwargs):
+    bump_version(sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipes_version(sender, instance, update_fields, **kwargs):
+    if (
+        update_fields != LOGIN_FIELDS
+        and Recipe.objects.filter(author=instance).exists()
+    ):
+        bump_version(Recipe)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search_vector(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        refresh_search_vectors, Recipe.objects.filter(pk=instance.pk)
+    ))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_recipe_ingredient_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(mark_recipe_changed, instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_ingredient_search_vectors(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(partial(
+            refresh_search_vectors,
+            Recipe.objects.filter(ingredients=instance)
+        ))
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    shift_counter(
+        Recipe.objects.filter(pk=instance.recipe_id),
+        RECIPE_COUNTERS[sender], -1
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def add_leaderboard_event(sender, instance, created, **kwargs):
+    if created:
+        record_event(instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def remove_leaderboard_event(sender, instance, **kwargs):
+    record_event(instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def create_leaderboard_entry(sender, instance, created, **kwargs):
+    if created:
+        LeaderboardEntry.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    shift_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_new_recipe(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(fan_out_recipe, instance.pk))
+
+
+@receiver(post_save, sender=Subscribe)
+def add_subscription(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(
+            User.objects.filter(pk=instance.following_id),
+            'followers_count', 1
+        )
+        transaction.on_commit(partial(
+            add_author_to_feed, instance.user_id, instance.following_id
+        ))
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_subscription(sender, instance, **kwargs):
+    author = User.objects.select_for_update().filter(pk=instance.following_id)
+    followers_count = author.values_list('followers_count', flat=True).first()
+    shift_counter(author, 'followers_count', -1)
+    remove_author_from_feed(instance.user_id, instance.following_id)
+    if (
+        followers_count is not None
+        and followers_count - 1 <= settings.FEED_FANOUT_THRESHOLD
+        < followers_count
+    ):
+        transaction.on_commit(partial(restore_fan_out, instance.following_id))
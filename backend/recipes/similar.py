@@ -0,0 +1,190 @@
+import hashlib
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+
+import numpy as np
+
+from .models import IngredientRecipe, RecipeSignature, SimilarRecipe, TagRecipe
+
+MERSENNE_PRIME = (1 << 31) - 1
+MINHASH_SEED = 20220725
+MINHASH_CHUNK_SIZE = 5000
+MAX_BUCKET_SIZE = 1000
+
+
+def load_features():
+    """Ingredient and tag ids of every recipe as one set of integers."""
+    features = defaultdict(set)
+    for recipe_id, ingredient_id in IngredientRecipe.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    ).order_by().iterator():
+        features[recipe_id].add(2 * ingredient_id)
+    for recipe_id, tag_id in TagRecipe.objects.values_list(
+        'recipe_id', 'tag_id'
+    ).order_by().iterator():
+        features[recipe_id].add(2 * tag_id + 1)
+    return features
+
+
+def get_fingerprint(features):
+    return hashlib.sha1(
+        ','.join(map(str, sorted(features))).encode('ascii')
+    ).hexdigest()
+
+
+def minhash_signatures(feature_sets, permutations):
+    """MinHash signatures of non-empty sets, one uint32 row per set."""
+    random_state = np.random.RandomState(MINHASH_SEED)
+    a = random_state.randint(
+        1, MERSENNE_PRIME, size=permutations
+    ).astype(np.uint64)
+    b = random_state.randint(
+        0, MERSENNE_PRIME, size=permutations
+    ).astype(np.uint64)
+    signatures = np.empty((len(feature_sets), permutations), dtype=np.uint32)
+    for start in range(0, len(feature_sets), MINHASH_CHUNK_SIZE):
+        chunk = feature_sets[start:start + MINHASH_CHUNK_SIZE]
+        sizes = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        values = np.fromiter(
+            chain.from_iterable(chunk), dtype=np.uint64, count=sizes.sum()
+        ) % MERSENNE_PRIME
+        hashes = (np.outer(values, a) + b) % MERSENNE_PRIME
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(
+            hashes, offsets, axis=0
+        )
+    return signatures
+
+
+class LSHIndex:
+    """Locality-sensitive hashing over the bands of MinHash signatures."""
+
+    def __init__(self, signatures, bands):
+        rows = signatures.shape[1] // bands
+        self.bands = []
+        for band in range(bands):
+            _, codes = np.unique(
+                signatures[:, band * rows:(band + 1) * rows],
+                axis=0, return_inverse=True
+            )
+            codes = codes.reshape(-1)
+            order = np.argsort(codes, kind='stable')
+            self.bands.append((codes, order, codes[order]))
+
+    def candidates(self, position):
+        result = set()
+        for codes, order, sorted_codes in self.bands:
+            start, end = np.searchsorted(
+                sorted_codes, [codes[position], codes[position] + 1]
+            )
+            if 1 < end - start <= MAX_BUCKET_SIZE:
+                result.update(order[start:end].tolist())
+        result.discard(position)
+        return result
+
+
+def refresh_similar_recipes(full=False):
+    """Recompute neighbours of changed recipes and of those they touch."""
+    permutations = settings.SIMILAR_RECIPES_PERMUTATIONS
+    count = settings.SIMILAR_RECIPES_COUNT
+    features = load_features()
+    stored = {
+        recipe_id: (fingerprint, bytes(signature))
+        for recipe_id, fingerprint, signature
+        in RecipeSignature.objects.values_list(
+            'recipe_id', 'fingerprint', 'signature'
+        ).iterator()
+    }
+    fingerprints = {
+        recipe_id: get_fingerprint(recipe_features)
+        for recipe_id, recipe_features in features.items()
+    }
+    changed = {
+        recipe_id for recipe_id, fingerprint in fingerprints.items()
+        if full
+        or recipe_id not in stored
+        or stored[recipe_id][0] != fingerprint
+        or len(stored[recipe_id][1]) != permutations * 4
+    }
+    removed = set(stored) - set(features)
+    if not changed and not removed:
+        return 0, 0
+
+    recipe_ids = sorted(features)
+    positions = {
+        recipe_id: position for position, recipe_id in enumerate(recipe_ids)
+    }
+    signatures = np.empty((len(recipe_ids), permutations), dtype=np.uint32)
+    changed_ids = sorted(changed)
+    if changed_ids:
+        signatures[[positions[recipe_id] for recipe_id in changed_ids]] = (
+            minhash_signatures(
+                [features[recipe_id] for recipe_id in changed_ids],
+                permutations
+            )
+        )
+    for recipe_id in recipe_ids:
+        if recipe_id not in changed:
+            signatures[positions[recipe_id]] = np.frombuffer(
+                stored[recipe_id][1], dtype=np.uint32
+            )
+
+    lsh = LSHIndex(signatures, settings.SIMILAR_RECIPES_BANDS)
+    candidates = {
+        recipe_id: lsh.candidates(positions[recipe_id])
+        for recipe_id in changed_ids
+    }
+    affected = set(changed) | set(SimilarRecipe.objects.filter(
+        similar_id__in=changed | removed
+    ).values_list('recipe_id', flat=True))
+    for recipe_candidates in candidates.values():
+        affected.update(recipe_ids[position] for position in recipe_candidates)
+    affected &= set(features)
+    for recipe_id in affected - set(candidates):
+        candidates[recipe_id] = lsh.candidates(positions[recipe_id])
+
+    neighbours = []
+    for recipe_id in affected:
+        recipe_features = features[recipe_id]
+        scored = []
+        for position in candidates[recipe_id]:
+            other_features = features[recipe_ids[position]]
+            shared = len(recipe_features & other_features)
+            scored.append((
+                shared / (
+                    len(recipe_features) + len(other_features) - shared
+                ),
+                recipe_ids[position]
+            ))
+        scored.sort(reverse=True)
+        neighbours.extend(
+            SimilarRecipe(
+                recipe_id=recipe_id, similar_id=similar_id,
+                score=score, rank=rank
+            )
+            for rank, (score, similar_id) in enumerate(scored[:count])
+        )
+
+    with transaction.atomic():
+        RecipeSignature.objects.filter(
+            recipe_id__in=changed | removed
+        ).delete()
+        RecipeSignature.objects.bulk_create(
+            [
+                RecipeSignature(
+                    recipe_id=recipe_id,
+                    fingerprint=fingerprints[recipe_id],
+                    signature=signatures[positions[recipe_id]].tobytes()
+                )
+                for recipe_id in changed_ids
+            ],
+            batch_size=1000
+        )
+        SimilarRecipe.objects.filter(
+            recipe_id__in=affected | removed
+        ).delete()
+        SimilarRecipe.objects.bulk_create(neighbours, batch_size=1000)
+    return len(changed), len(affected)
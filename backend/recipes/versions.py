@@ -0,0 +1,59 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from users.models import User
+
+from .models import Cart, Favorite, ModelVersion, Subscribe
+
+USER_STAMP_MODELS = (Favorite, Cart, Subscribe)
+
+
+def bump_version(model):
+    """Increase the version stamp of ``model`` after its rows changed."""
+    label = model._meta.label_lower
+    updated = ModelVersion.objects.filter(label=label).update(
+        version=F('version') + 1, modified=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ModelVersion.objects.create(label=label, version=1)
+        except IntegrityError:
+            bump_version(model)
+
+
+def get_versions(models):
+    """Return ``{label: (version, modified)}`` for the given models."""
+    labels = [model._meta.label_lower for model in models]
+    stamps = dict.fromkeys(labels, (0, None))
+    stamps.update(
+        (label, (version, modified))
+        for label, version, modified in ModelVersion.objects.filter(
+            label__in=labels
+        ).values_list('label', 'version', 'modified')
+    )
+    return stamps
+
+
+def get_version(model):
+    return get_versions([model])[model._meta.label_lower][0]
+
+
+def get_user_stamp(user):
+    """Counts and newest ids of the user's favorites, carts and follows."""
+    annotations = {}
+    for model in USER_STAMP_MODELS:
+        rows = model.objects.filter(
+            user=OuterRef('pk')
+        ).order_by().values('user')
+        name = model._meta.model_name
+        annotations[f'{name}_count'] = Subquery(
+            rows.annotate(value=Count('pk')).values('value')
+        )
+        annotations[f'{name}_last'] = Subquery(
+            rows.annotate(value=Max('pk')).values('value')
+        )
+    return User.objects.filter(pk=user.pk).annotate(
+        **annotations
+    ).values_list(*annotations).first()
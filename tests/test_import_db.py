@@ -0,0 +1,43 @@
+import io
+import json
+
+from django.core.management.base import CommandError
+
+import pytest
+from recipes.management.commands import import_db
+
+INGREDIENTS = [
+    {'name': 'молоко', 'measurement_unit': 'мл'},
+    {'name': 'соус {острый}, [чили]', 'measurement_unit': 'г'},
+    {'name': 'сыр "пармезан"', 'measurement_unit': 'г'},
+    {'name': 'яйцо', 'measurement_unit': 'шт.'},
+]
+EXPECTED = [(item['name'], item['measurement_unit']) for item in INGREDIENTS]
+
+
+def read(text):
+    return list(import_db.iter_json_array(io.StringIO(text)))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 16, 64 * 1024])
+def test_objects_straddling_chunks(monkeypatch, chunk_size):
+    monkeypatch.setattr(import_db, 'READ_CHUNK_SIZE', chunk_size)
+    text = json.dumps(INGREDIENTS, ensure_ascii=False, indent=2)
+    assert read(text) == EXPECTED
+
+
+def test_empty_array(monkeypatch):
+    monkeypatch.setattr(import_db, 'READ_CHUNK_SIZE', 1)
+    assert read('  [ ]  ') == []
+
+
+def test_not_an_array():
+    with pytest.raises(CommandError):
+        read(json.dumps(INGREDIENTS[0]))
+
+
+def test_truncated_file(monkeypatch):
+    monkeypatch.setattr(import_db, 'READ_CHUNK_SIZE', 7)
+    text = json.dumps(INGREDIENTS, ensure_ascii=False)
+    with pytest.raises(CommandError):
+        read(text[:len(text) // 2])
@@ -0,0 +1,90 @@
+import base64
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+import pytest
+from recipes.models import Recipe
+from rest_framework.test import APIClient
+from users.models import User
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA'
+    '60e6kgAAAABJRU5ErkJggg=='
+)
+PAGE_SIZE = 3
+
+
+@pytest.fixture
+def recipes():
+    author = User.objects.create_user(
+        username='author', email='author@example.com', password='password',
+        first_name='Author', last_name='Author'
+    )
+    recipes = [
+        Recipe.objects.create(
+            author=author, name=f'Recipe {number}', text='Text',
+            cooking_time=10, image=ContentFile(PNG, name='recipe.png')
+        )
+        for number in range(8)
+    ]
+    now = timezone.now()
+    for number, recipe in enumerate(recipes):
+        recipe.pub_date = now - timedelta(minutes=number)
+    for recipe in recipes[2:7]:
+        recipe.pub_date = now - timedelta(hours=1)
+    Recipe.objects.bulk_update(recipes, ['pub_date'])
+    return list(
+        Recipe.objects.order_by('-pub_date', '-id').values_list('id', flat=True)
+    )
+
+
+def get_page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.data
+
+
+def walk(client, url, direction):
+    pages = []
+    while url:
+        assert len(pages) < 10, 'the cursor does not advance'
+        page = get_page(client, url)
+        pages.append([recipe['id'] for recipe in page['results']])
+        url = page[direction]
+    return pages
+
+
+@pytest.mark.django_db
+def test_next_pages_cover_all_recipes_in_order(recipes):
+    client = APIClient()
+    pages = walk(client, f'/api/recipes/?cursor=&limit={PAGE_SIZE}', 'next')
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert sum(pages, []) == recipes
+
+
+@pytest.mark.django_db
+def test_previous_pages_mirror_next_pages(recipes):
+    client = APIClient()
+    url = f'/api/recipes/?cursor=&limit={PAGE_SIZE}'
+    first = get_page(client, url)
+    assert first['previous'] is None
+    last = get_page(client, first['next'])
+    last = get_page(client, last['next'])
+    assert last['next'] is None
+    assert last['previous'] is not None
+    pages = walk(client, last['previous'], 'previous')
+    assert sum(reversed(pages), []) == recipes[:-len(last['results'])]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(recipes):
+    response = APIClient().get('/api/recipes/?cursor=garbage')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_cursor_with_ordering(recipes):
+    response = APIClient().get('/api/recipes/?cursor=&ordering=popular')
+    assert response.status_code == 400